@@ -6,6 +6,12 @@ import plotly.graph_objects as go
 from datetime import datetime
 import os
 import glob
+import io
+import hashlib
+import tempfile
+import time
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 # Page configuration
 st.set_page_config(
@@ -17,42 +23,607 @@ st.set_page_config(
 # Title
 st.title("📞 Call Analysis Dashboard")
 
-# Load data
-@st.cache_data
+# Parsed CSVs are cached as Parquet, keyed by a hash of the file bytes, so a
+# file that was loaded before (e.g. after an app restart) skips CSV parsing.
+# The cache holds call data (phone numbers, transcripts), so it lives in a
+# private per-user directory and is pruned by age and total size.
+# Bump the version whenever load_data's output changes.
+PARQUET_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "call_analysis_dashboard"
+)
+PARQUET_CACHE_VERSION = 7
+PARQUET_CACHE_MAX_AGE = 7 * 24 * 60 * 60  # seconds since last use
+PARQUET_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Failures of the (optional) cache are never allowed to fail a load
+PARQUET_CACHE_ERRORS = (OSError, ValueError, pa.ArrowException)
+
+def parquet_cache_path(raw_bytes):
+    """Location of the cached Parquet copy of a CSV with these bytes"""
+    digest = hashlib.sha256(raw_bytes).hexdigest()
+    return os.path.join(PARQUET_CACHE_DIR, f"v{PARQUET_CACHE_VERSION}-{digest}.parquet")
+
+def read_parquet_cache(cache_path):
+    """The cached frame for this path, or None if there is no usable copy"""
+    try:
+        df = pd.read_parquet(cache_path)
+        os.utime(cache_path)  # Mark as recently used for pruning
+    except PARQUET_CACHE_ERRORS:
+        return None
+    return df
+
+def prune_parquet_cache():
+    """Delete cache files unused for too long, then the oldest ones over the size cap"""
+    entries = []
+    for entry in os.scandir(PARQUET_CACHE_DIR):
+        if entry.is_file():
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    
+    now = time.time()
+    kept_bytes = 0
+    for mtime, size, path in sorted(entries, reverse=True):  # Newest first
+        if now - mtime <= PARQUET_CACHE_MAX_AGE and kept_bytes + size <= PARQUET_CACHE_MAX_BYTES:
+            kept_bytes += size
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def write_parquet_cache(df, cache_path):
+    """Best-effort write of the Parquet cache; loading never fails because of it"""
+    tmp_path = None
+    try:
+        os.makedirs(PARQUET_CACHE_DIR, mode=0o700, exist_ok=True)
+        os.chmod(PARQUET_CACHE_DIR, 0o700)
+        # mkstemp creates a uniquely named file readable by the owner only
+        # (0600); writing there first means other sessions never read a
+        # partial file
+        fd, tmp_path = tempfile.mkstemp(dir=PARQUET_CACHE_DIR, suffix='.tmp')
+        os.close(fd)
+        df.to_parquet(tmp_path, compression='zstd')
+        os.replace(tmp_path, cache_path)
+        tmp_path = None
+        prune_parquet_cache()
+    except PARQUET_CACHE_ERRORS:
+        pass
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+def arrow_strings(df, object_columns=False):
+    """Re-type a Parquet frame's text columns as Arrow strings, as the CSV reader produces"""
+    # Parquet restores Arrow strings as StringDtype; files written by other
+    # tools often hold plain object strings instead (object_columns=True)
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.StringDtype) or (
+            object_columns and dtype == object
+            and pd.api.types.infer_dtype(df[col], skipna=True) == 'string'
+        ):
+            df[col] = df[col].astype(pd.ArrowDtype(pa.string()))
+
+# Load data. The frame is cached as a shared resource rather than pickled
+# and copied on every rerun, so it must be treated as read-only after load.
+@st.cache_resource(show_spinner="Loading call data...")
 def load_data(file):
     # Handle both file path (string) and uploaded file object
-    if isinstance(file, str):
-        df = pd.read_csv(file)
+    file_name = file if isinstance(file, str) else file.name
+    cache_path = None
+    if file_name.lower().endswith('.parquet'):
+        # Columnar and already typed, so there is no text to parse; the
+        # coercions below are cheap no-ops on correctly typed columns
+        df = pd.read_parquet(file)
+        arrow_strings(df, object_columns=True)
     else:
-        df = pd.read_csv(file)
+        if isinstance(file, str):
+            with open(file, 'rb') as f:
+                raw_bytes = f.read()
+        else:
+            raw_bytes = file.getvalue()
+        
+        cache_path = parquet_cache_path(raw_bytes)
+        df = read_parquet_cache(cache_path) if os.path.exists(cache_path) else None
+        if df is not None:
+            # Already parsed and normalized: read the typed columns back.
+            # Parquet restores Arrow strings as StringDtype and boolean
+            # categoricals as object, so those are re-tagged.
+            arrow_strings(df)
+            df['Analysis.task_completion'] = df['Analysis.task_completion'].astype('category')
+            return df
+        
+        # Arrow's multithreaded CSV reader with the known column types:
+        # phone numbers are always read as text so they are never inferred as
+        # integers (or floats with NaN), Time is read as text so pd.to_datetime
+        # keeps each timestamp's own UTC offset (Arrow would convert ISO-8601
+        # offsets to UTC), and the label columns are dictionary-encoded while
+        # parsing, arriving as pandas categoricals
+        table = pacsv.read_csv(
+            io.BytesIO(raw_bytes),
+            convert_options=pacsv.ConvertOptions(
+                column_types={
+                    'Number': pa.string(),
+                    'Time': pa.string(),
+                    'Use Case': pa.dictionary(pa.int32(), pa.string()),
+                    'Call Status': pa.dictionary(pa.int32(), pa.string()),
+                },
+                strings_can_be_null=True
+            )
+        )
+        # Text columns (phone numbers, summaries, URLs, ...) stay Arrow
+        # strings: one contiguous buffer per column instead of a Python
+        # object per cell
+        df = table.to_pandas(types_mapper={pa.string(): pd.ArrowDtype(pa.string())}.get)
     
-    # Convert duration to numeric if needed
-    df['Duration'] = pd.to_numeric(df['Duration'], errors='coerce').fillna(0)
+    # Phone numbers as Arrow strings (a no-op for CSVs, which already read
+    # them that way): isin/compare/groupby run as Arrow C++ kernels
+    # instead of on Python objects
+    df['Number'] = df['Number'].astype(pd.ArrowDtype(pa.string()))
+    
+    # Convert duration to numeric if needed. Whole seconds are stored as
+    # int32 (half the bytes of float64 for every filter/aggregate scan);
+    # fractional durations fall back to float32
+    duration = pd.to_numeric(df['Duration'], errors='coerce')
+    if pd.api.types.is_integer_dtype(duration) and not duration.hasnans:
+        # Parsed as integers already: nothing missing to fill, no fractions to check
+        df['Duration'] = duration.astype('int32')
+    else:
+        # As plain float64 (a column with text cells arrives as Arrow
+        # strings and coerces to double[pyarrow]); missing and unparseable
+        # durations count as 0
+        seconds = duration.to_numpy(dtype='float64', na_value=np.nan)
+        seconds = np.where(np.isnan(seconds), 0, seconds)
+        df['Duration'] = seconds.astype('int32' if (seconds % 1 == 0).all() else 'float32')
     # Parse time
     df['Time'] = pd.to_datetime(df['Time'])
     
-    # Normalize columns
-    df['Analysis.task_completion'] = (
-        df['Analysis.task_completion']
-        .astype(str)
-        .str.lower()
-        .map({'true': True, 'false': False, 'True': True, 'False': False})
+    # Normalize columns. Task completion only has a handful of distinct
+    # values, so factorize once and map each distinct value (not each row);
+    # code -1 (missing) picks up the trailing NaN in the lookup table.
+    codes, uniques = pd.factorize(df['Analysis.task_completion'])
+    completion_map = {'true': True, 'false': False}
+    lookup = np.array(
+        [completion_map.get(str(v).lower(), np.nan) for v in uniques] + [np.nan],
+        dtype=object
     )
+    df['Analysis.task_completion'] = lookup[codes]
     
+    # Lowercasing runs as an Arrow compute kernel instead of a Python call per cell
     df['Analysis.user_sentiment'] = (
         df['Analysis.user_sentiment']
-        .astype(str)
+        .astype('string[pyarrow]')
         .str.lower()
         .replace({'n.a': None, '-': None, 'nan': None})
     )
     
     # Create derived columns
-    df['call_date'] = df['Time'].dt.date
-    df['Hour'] = df['Time'].dt.hour
+    # The call date stays a datetime64 column (local midnight) rather than
+    # an array of Python date objects; hours fit in int8 (nullable Int8
+    # when some calls have no timestamp)
+    df['call_date'] = df['Time'].dt.normalize().dt.tz_localize(None)
+    df['Hour'] = df['Time'].dt.hour.astype('Int8' if df['Time'].hasnans else 'int8')
     df['DayOfWeek'] = df['Time'].dt.day_name()
+    # A call's duration bucket never changes, so it is binned once here
+    df['Duration_Bucket'] = pd.cut(
+        df['Duration'],
+        bins=[0, 10, 30, 60, 120, 300, np.inf],
+        labels=['0-10s', '11-30s', '31-60s', '1-2min', '2-5min', '5min+'],
+        include_lowest=True
+    )
+    
+    # Low-cardinality labels as categoricals: isin/== and groupby then work
+    # on small integer codes instead of hashing Python strings. Categories
+    # are kept sorted (the CSV reader lists them in order of appearance) so
+    # grouped tables list labels in order, and limited to the labels that
+    # occur (a Parquet export keeps its source's full category list).
+    for col in ['Use Case', 'Call Status', 'Analysis.task_completion', 'Analysis.user_sentiment']:
+        labels = df[col].astype('category').cat.remove_unused_categories()
+        df[col] = labels.cat.reorder_categories(sorted(labels.cat.categories))
+    
+    if cache_path is not None:
+        write_parquet_cache(df, cache_path)
     
     return df
 
+# Filter options depend only on the loaded file, so they are computed once
+# per file rather than rescanned on every rerun
+@st.cache_data(show_spinner=False)
+def filter_domains(data_key, _df):
+    """Sidebar filter options and duration bounds for the loaded calls"""
+    # load_data drops unused categories, so the categories are exactly the
+    # labels present in the file and no row scan is needed
+    return {
+        'use_cases': sorted(_df['Use Case'].cat.categories),
+        'call_statuses': sorted(_df['Call Status'].cat.categories),
+        'min_duration': int(_df['Duration'].min()),
+        'max_duration': int(_df['Duration'].max()),
+        # Exact bounds (durations may be fractional) for skipping a full-range filter
+        'duration_bounds': (_df['Duration'].min(), _df['Duration'].max()),
+    }
+
+@st.cache_data(show_spinner=False)
+def number_codes(data_key, _df):
+    """Integer code per call's Number (-1 if missing) and the distinct Numbers"""
+    codes, numbers = pd.factorize(_df['Number'])
+    return codes, pd.Index(numbers)
+
+def category_mask(column, values):
+    """Rows of a categorical column whose value is selected (None selects missing)
+
+    Returns None when every row would pass, so the caller can skip the mask.
+    """
+    # One keep/drop entry per category plus a trailing slot that code -1
+    # (missing) picks up, so the mask is a single gather over integer codes
+    keep = np.zeros(len(column.cat.categories) + 1, dtype=bool)
+    selected = column.cat.categories.get_indexer([v for v in values if v is not None])
+    keep[selected[selected >= 0]] = True
+    keep[-1] = None in values
+    # The default sidebar state selects everything
+    if keep[:-1].all() and (keep[-1] or not column.hasnans):
+        return None
+    return keep[column.cat.codes.to_numpy()]
+
+# Filtering and derived tables are memoized per filter combination.
+# `filter_key` identifies the loaded file plus every sidebar selection, so
+# the DataFrame arguments (prefixed with `_`) are not hashed on each rerun.
+# Each cache keeps only the most recent filter states (the exports, which
+# hold the whole filtered file, just the last couple) so memory stays
+# bounded however many combinations are tried.
+FILTER_CACHE_ENTRIES = 16
+EXPORT_CACHE_ENTRIES = 2
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def apply_filters(filter_key, _df):
+    """Row positions of the loaded calls that pass the sidebar filters
+
+    Returns slice(None) when no filter restricts anything.
+    """
+    data_key, use_cases, statuses, completions, duration_range, excluded_numbers = filter_key
+    
+    # Build each predicate as a plain NumPy array and combine them in a
+    # single reduction instead of chaining Series `&`. Task completion
+    # includes NaN values when "N/A" (None) is selected. Filters that keep
+    # every row contribute no predicate at all.
+    predicates = [
+        category_mask(_df['Use Case'], use_cases),
+        category_mask(_df['Call Status'], statuses),
+        category_mask(_df['Analysis.task_completion'], completions),
+    ]
+    
+    lowest, highest = filter_domains(data_key, _df)['duration_bounds']
+    duration = _df['Duration'].to_numpy()
+    if duration_range[0] > lowest:
+        predicates.append(duration >= duration_range[0])
+    if duration_range[1] < highest:
+        predicates.append(duration <= duration_range[1])
+    
+    # Apply number exclusion: only the pasted numbers are looked up among the
+    # distinct Numbers, then rows are matched on integer codes. Unknown
+    # numbers (and missing Numbers, code -1) exclude nothing.
+    if excluded_numbers:
+        codes, numbers = number_codes(data_key, _df)
+        excluded_codes = numbers.get_indexer(list(excluded_numbers))
+        excluded_codes = excluded_codes[excluded_codes >= 0]
+        if len(excluded_codes):
+            predicates.append(np.isin(codes, excluded_codes, invert=True))
+    
+    predicates = [p for p in predicates if p is not None]
+    if not predicates:
+        return slice(None)
+    # Only the positions are cached, never a copy of the filtered frame
+    return np.flatnonzero(np.logical_and.reduce(predicates))
+
+# Columns the dashboard reads from the filtered calls. The free-text
+# Analysis.* columns are only needed by the CSV export, which takes them
+# straight from the loaded frame.
+ANALYSIS_COLUMNS = [
+    'Number', 'Time', 'Use Case', 'Call Status', 'Duration',
+    'Analysis.task_completion', 'Analysis.user_sentiment',
+    'call_date', 'Hour', 'DayOfWeek', 'Duration_Bucket',
+]
+
+def filtered_view(df, rows):
+    """The filtered calls, restricted to ANALYSIS_COLUMNS, in a single take"""
+    return df.iloc[rows, df.columns.get_indexer(ANALYSIS_COLUMNS)]
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def call_flags(filter_key, _filtered_df):
+    """Per-call boolean flags shared by the KPIs, the Nth call tabs, the heatmaps and the table builder"""
+    # Each comparison runs once per filter combination instead of once per table
+    status = _filtered_df['Call Status']
+    return pd.DataFrame({
+        'completed': status == 'completed',
+        'could_not_connect': status == 'could_not_connect',
+        'task_success': _filtered_df['Analysis.task_completion'] == True,  # Only True, not fillna
+        'negative': _filtered_df['Analysis.user_sentiment'] == 'negative',
+    })
+
+def time_order(time):
+    """Positions that sort `time` ascending, ties in row order (a stable argsort)"""
+    # Call logs are exported oldest- or newest-first, which one pass detects,
+    # so the usual case needs no comparison sort at all
+    n = len(time)
+    if (time[1:] >= time[:-1]).all():
+        return np.arange(n)
+    if (time[1:] <= time[:-1]).all():
+        # Newest-first: reverse the rows, then flip each run of equal
+        # timestamps back so ties keep their original row order
+        order = np.arange(n)[::-1]
+        reversed_time = time[order]
+        is_first = np.ones(n, dtype=bool)
+        is_first[1:] = reversed_time[1:] != reversed_time[:-1]
+        run_starts = np.flatnonzero(is_first)
+        run_lengths = np.diff(np.append(run_starts, n))
+        run_ends = np.repeat(run_starts + run_lengths - 1, run_lengths)
+        return order[np.repeat(run_starts, run_lengths) + run_ends - np.arange(n)]
+    return np.argsort(time, kind='stable')
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def key_metrics(filter_key, _filtered_df, _flags):
+    """Headline KPI values for the filtered calls"""
+    # One pass over Call Status for all the per-status counts
+    status_counts = _filtered_df['Call Status'].value_counts()
+    
+    # Average duration (only for calls with duration > 0), as one masked
+    # reduction over the Duration array instead of filtering the frame
+    duration = _filtered_df['Duration'].to_numpy()
+    answered = duration > 0
+    
+    return {
+        'total_calls': len(_filtered_df),
+        'call_placed': int(status_counts.get('call_placed', 0)),
+        'could_not_connect': int(status_counts.get('could_not_connect', 0)),
+        'completed': int(status_counts.get('completed', 0)),
+        # Task completion success (true only, from ALL filtered calls)
+        'task_success': int(_flags['task_success'].sum()),
+        'avg_duration': float(duration[answered].mean()) if answered.any() else np.nan,
+    }
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def call_sequence(filter_key, _filtered_df, _flags):
+    """Each filtered call's number per user, with its flags, in (Number, Time) order"""
+    # Sort once by (Number, Time): factorize gives sortable integer user codes,
+    # and a stable sort of the time-ordered codes keeps each user's calls in
+    # time order. Calls without a Number can't be sequenced and are left out (code -1).
+    number_codes, _ = pd.factorize(_filtered_df['Number'], sort=True)
+    # Calls without a timestamp sort after the user's timed calls, as
+    # sort_values puts NaT last (NaT is int64 min otherwise)
+    time = _filtered_df['Time']
+    time_ns = np.where(time.isna().to_numpy(), np.iinfo(np.int64).max, time.astype('int64').to_numpy())
+    order = time_order(time_ns)
+    order = order[np.argsort(number_codes[order], kind='stable')]
+    order = order[number_codes[order] >= 0]
+    number_codes = number_codes[order]
+    
+    # Call number = position within each run of equal user codes
+    is_first = np.ones(len(number_codes), dtype=bool)
+    is_first[1:] = number_codes[1:] != number_codes[:-1]
+    run_starts = np.flatnonzero(is_first)
+    run_lengths = np.diff(np.append(run_starts, len(number_codes)))
+    call_number = np.arange(len(number_codes)) - np.repeat(run_starts, run_lengths) + 1
+    
+    # Only the flag arrays are kept, so the filtered frame itself is never copied
+    def flag(name):
+        return _flags[name].to_numpy(dtype='int8')[order]
+    
+    return pd.DataFrame({
+        'call_number': call_number,
+        'completed_flag': flag('completed'),
+        'goal_flag': flag('task_success'),
+        'negative_flag': flag('negative'),
+    })
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def nth_call_counts(filter_key, _analysis_df):
+    """Per-call-number totals shared by the call number and pickup rate tabs"""
+    # Call numbers are small dense integers, so each measure is a single
+    # bincount pass over the sequenced calls - INCLUDING all call statuses
+    call_number = _analysis_df['call_number'].to_numpy()
+    
+    def count(flag=None):
+        weights = None if flag is None else _analysis_df[flag].to_numpy()
+        return np.bincount(call_number, weights=weights).astype(np.int64)
+    
+    counts = pd.DataFrame({
+        'total_calls': count(),
+        'picked_up': count('completed_flag'),
+        'goal_met': count('goal_flag'),
+        'negative_sentiment': count('negative_flag'),
+    }).rename_axis('call_number')
+    return counts.iloc[1:]  # Call numbers start at 1
+
+def nth_call_analytics(filter_key, analysis_df):
+    """Performance metrics by call number (1st call, 2nd call, ...) per user"""
+    nth_analytics = nth_call_counts(filter_key, analysis_df).reset_index()
+    
+    # Calculate rates
+    nth_analytics['Call Pick Rate'] = (nth_analytics['picked_up'] / nth_analytics['total_calls'] * 100).round(1)
+    nth_analytics['Goal Success on Picked Calls'] = (
+        (nth_analytics['goal_met'] / nth_analytics['picked_up'] * 100)
+        .replace([np.inf, -np.inf], 0)
+        .fillna(0)
+        .round(1)
+    )
+    nth_analytics['Driver Negative'] = nth_analytics['negative_sentiment']
+    return nth_analytics
+
+def pickup_funnel(filter_key, analysis_df):
+    """Pickup rate by call attempt number"""
+    attempt_funnel = (
+        nth_call_counts(filter_key, analysis_df)[['total_calls', 'picked_up']]
+        .rename(columns={'total_calls': 'attempts', 'picked_up': 'completed'})
+        .rename_axis('call_attempt')
+        .reset_index()
+    )
+    
+    attempt_funnel['pickup_rate_pct'] = (
+        attempt_funnel['completed'] / attempt_funnel['attempts'] * 100
+    ).round(1)
+    return attempt_funnel
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def user_call_summary(filter_key, _filtered_df, _flags, deduplicate, heatmap_type):
+    """User-level call counts feeding the frequency heatmaps"""
+    # Only the columns the summary needs, rather than a copy of the whole frame
+    heatmap_df = pd.DataFrame({
+        'Number': _filtered_df['Number'],
+        'Time': _filtered_df['Time'],
+        'call_date': _filtered_df['call_date'],
+        'completed_flag': _flags['completed'].astype('int8'),
+        'task_true_flag': _flags['task_success'].astype('int8'),
+    })
+    
+    # Use all calls or deduplicate based on toggle
+    if deduplicate:
+        heatmap_df = (
+            heatmap_df.sort_values(
+                by=['Number', 'call_date', 'completed_flag', 'Time'],
+                ascending=[True, True, False, True]
+            )
+            .drop_duplicates(subset=['Number', 'call_date'], keep='first')
+        )
+    
+    if heatmap_type == "Total Calls vs Completed Calls":
+        flag, count_name = 'completed_flag', 'completed_calls'  # Only completed
+    else:
+        flag, count_name = 'task_true_flag', 'task_true_completed'  # Only True
+    
+    # User-level aggregation - ALL calls included. factorize gives dense
+    # user codes, so per-user sums are bincounts rather than a hashed
+    # groupby; calls without a Number (code -1) are left out as before
+    number_codes, numbers = pd.factorize(heatmap_df['Number'])
+    has_number = number_codes >= 0
+    number_codes = number_codes[has_number]
+    flags = heatmap_df[flag].to_numpy()[has_number]
+    return pd.DataFrame({
+        'Number': numbers,
+        'total_calls': np.bincount(number_codes, minlength=len(numbers)),  # All calls
+        count_name: np.bincount(number_codes, weights=flags, minlength=len(numbers)).astype(np.int64),
+    })
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def heatmap_frequency(filter_key, _user_summary, deduplicate, heatmap_type):
+    """Row-percentage table behind the frequency heatmap, impossible cells masked"""
+    # Bucketing, crosstab and masking are skipped on reruns that leave the
+    # filters and heatmap options unchanged
+    _user_summary = _user_summary.copy()
+    if heatmap_type == "Total Calls vs Completed Calls":
+        # Create 10+ bucket
+        _user_summary['total_calls_bucket'] = _user_summary['total_calls'].clip(upper=10)
+        _user_summary['completed_calls_bucket'] = _user_summary['completed_calls'].clip(upper=10)
+        
+        # Frequency table as row percentages, in a single crosstab
+        heatmap_pct = pd.crosstab(
+            _user_summary['total_calls_bucket'],
+            _user_summary['completed_calls_bucket'],
+            normalize='index'
+        ).mul(100)
+        
+        # Mask impossible cells (more completed than total calls) by
+        # broadcasting the column values against the row values
+        mask = heatmap_pct.columns.to_numpy()[None, :] > heatmap_pct.index.to_numpy()[:, None]
+        heatmap_pct_masked = heatmap_pct.mask(mask)
+    else:  # Task Success heatmap
+        # Create 10+ bucket for total_calls
+        total_calls = _user_summary['total_calls'].to_numpy()
+        _user_summary['total_calls_bucket'] = np.where(total_calls >= 10, "10+", total_calls.astype(str))
+        
+        # Frequency table as row percentages, in a single crosstab
+        heatmap_pct = pd.crosstab(
+            _user_summary['total_calls_bucket'],
+            _user_summary['task_true_completed'],
+            normalize='index'
+        ).mul(100)
+        
+        # Sort index properly
+        numeric_indices = [i for i in heatmap_pct.index if i != "10+"]
+        ordered_index = sorted(numeric_indices, key=int)
+        if "10+" in heatmap_pct.index:
+            ordered_index.append("10+")
+        heatmap_pct = heatmap_pct.loc[ordered_index]
+        
+        # Mask impossible cells (more task successes than total calls);
+        # the "10+" row is capped at 10
+        row_labels = heatmap_pct.index.to_numpy()
+        max_calls = np.where(row_labels == "10+", "10", row_labels).astype(np.int64)
+        mask = heatmap_pct.columns.to_numpy(dtype=np.int64)[None, :] > max_calls[:, None]
+        heatmap_pct_masked = heatmap_pct.mask(mask)
+    return heatmap_pct_masked
+
+# Table builder metric -> column of the multi_agg result
+BUILDER_METRIC_COLUMNS = {
+    'Count': 'Number',
+    'Completed Calls': 'Completed',
+    'Could Not Connect': 'Could Not Connect',
+    'Task Success Count': 'Task Success',
+    'Avg Duration': 'Avg Duration (s)',
+    'Total Duration': 'Total Duration (s)',
+    'Max Duration': 'Max Duration (s)',
+    'Negative Sentiment Count': 'Negative Sentiment',
+}
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def multi_agg(filter_key, _filtered_df, _flags, key):
+    """All table builder metrics per value of `key`, in a single groupby pass"""
+    # Built-in reductions over the shared flags and Duration - no Python
+    # callback per group; each table then just selects its columns
+    grouped = pd.DataFrame({
+        key: _filtered_df[key],
+        'Number': _filtered_df['Number'],
+        'Duration': _filtered_df['Duration'],
+        **_flags,
+    }).groupby(key, observed=True)
+    return grouped.agg(**{
+        'Number': ('Number', 'count'),  # Calls with a phone number
+        'Completed': ('completed', 'sum'),
+        'Could Not Connect': ('could_not_connect', 'sum'),
+        'Task Success': ('task_success', 'sum'),
+        'Avg Duration (s)': ('Duration', 'mean'),
+        'Total Duration (s)': ('Duration', 'sum'),
+        'Max Duration (s)': ('Duration', 'max'),
+        'Negative Sentiment': ('negative', 'sum'),
+    })
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def pivot_counts(filter_key, _filtered_df, row_var, col_var):
+    """Call counts for a row variable broken down by a column variable, with totals"""
+    return pd.crosstab(
+        _filtered_df[row_var],
+        _filtered_df[col_var],
+        margins=True,
+        margins_name='Total'
+    )
+
+# Columns load_data adds only for the dashboard's own use; the exports keep
+# the same schema as before they existed
+INTERNAL_COLUMNS = ['Duration_Bucket']
+
+def export_view(df, rows):
+    """The filtered calls with every exported column, in a single take"""
+    return df.iloc[rows, np.flatnonzero(~df.columns.isin(INTERNAL_COLUMNS))]
+
+@st.cache_data(show_spinner=False, max_entries=EXPORT_CACHE_ENTRIES)
+def filtered_csv(filter_key, _df, _rows):
+    """Filtered calls encoded as CSV bytes for the download button"""
+    # Encode straight into a byte buffer instead of building a str first
+    buffer = io.BytesIO()
+    export_view(_df, _rows).to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=EXPORT_CACHE_ENTRIES)
+def filtered_parquet(filter_key, _df, _rows):
+    """Filtered calls encoded as Parquet bytes for the download button"""
+    # Typed and compressed, so usually far smaller than the CSV, and it can
+    # be uploaded back without any CSV parsing
+    buffer = io.BytesIO()
+    export_view(_df, _rows).to_parquet(buffer, index=False, compression='zstd')
+    return buffer.getvalue()
+
 # File handling - check for CSV in data directory first
 @st.cache_data
 def find_latest_csv(directory="."):
@@ -77,7 +648,7 @@ if auto_loaded_file:
     
     # Option to upload different file
     with st.expander("📤 Upload a different file"):
-        manual_upload = st.file_uploader("Upload your call data CSV", type=['csv'])
+        manual_upload = st.file_uploader("Upload your call data (CSV or Parquet)", type=['csv', 'parquet'])
         if manual_upload is not None:
             uploaded_file = manual_upload
             use_auto_file = False
@@ -86,19 +657,22 @@ if auto_loaded_file:
             use_auto_file = True
 else:
     st.warning("No CSV files found in data directory. Please upload a file.")
-    uploaded_file = st.file_uploader("Upload your call data CSV", type=['csv'])
+    uploaded_file = st.file_uploader("Upload your call data (CSV or Parquet)", type=['csv', 'parquet'])
     use_auto_file = False
 
 if uploaded_file is not None:
     df = load_data(uploaded_file)
+    # Identifies the loaded data in the cache keys of the filter helpers
+    data_key = uploaded_file if isinstance(uploaded_file, str) else uploaded_file.file_id
     
     st.success(f"✅ Loaded {len(df):,} call records")
+    domains = filter_domains(data_key, df)
     
     # Sidebar for filters
     st.sidebar.header("🔍 Filters")
     
     # Use Case filter
-    use_cases = sorted(df['Use Case'].unique())
+    use_cases = domains['use_cases']
     selected_use_cases = st.sidebar.multiselect(
         "Select Use Cases",
         options=use_cases,
@@ -107,7 +681,7 @@ if uploaded_file is not None:
     )
     
     # Call Status filter
-    call_statuses = sorted(df['Call Status'].unique())
+    call_statuses = domains['call_statuses']
     selected_statuses = st.sidebar.multiselect(
         "Select Call Status",
         options=call_statuses,
@@ -131,8 +705,8 @@ if uploaded_file is not None:
     
     # Duration filter
     st.sidebar.subheader("Duration Range (seconds)")
-    min_duration = int(df['Duration'].min())
-    max_duration = int(df['Duration'].max())
+    min_duration = domains['min_duration']
+    max_duration = domains['max_duration']
     
     duration_range = st.sidebar.slider(
         "Select duration range",
@@ -163,31 +737,25 @@ if uploaded_file is not None:
         help="Default blocked numbers are pre-filled. Add or remove as needed."
     )
     
-    # Parse excluded numbers
-    excluded_numbers_list = []
-    if exclude_numbers:
-        excluded_numbers_list = [num.strip() for num in exclude_numbers.split('\n') if num.strip()]
+    # Parse excluded numbers (deduplicated, and sorted so the filter cache key is stable)
+    excluded_numbers_list = sorted(
+        frozenset(num.strip() for num in exclude_numbers.split('\n') if num.strip())
+    )
     
     # Apply filters
-    # Handle task completion filter with NaN values properly
-    if None in selected_completions:
-        # Include NaN values when "N/A" is selected
-        task_filter = (df['Analysis.task_completion'].isin([x for x in selected_completions if x is not None]) | 
-                      df['Analysis.task_completion'].isna())
-    else:
-        task_filter = df['Analysis.task_completion'].isin(selected_completions)
-    
-    filtered_df = df[
-        (df['Use Case'].isin(selected_use_cases)) &
-        (df['Call Status'].isin(selected_statuses)) &
-        task_filter &
-        (df['Duration'] >= duration_range[0]) &
-        (df['Duration'] <= duration_range[1])
-    ]
+    filter_key = (
+        data_key,
+        tuple(selected_use_cases),
+        tuple(selected_statuses),
+        tuple(selected_completions),
+        tuple(duration_range),
+        tuple(excluded_numbers_list),
+    )
+    filtered_rows = apply_filters(filter_key, df)
+    filtered_df = filtered_view(df, filtered_rows)
+    flags = call_flags(filter_key, filtered_df)
     
-    # Apply number exclusion
     if excluded_numbers_list:
-        filtered_df = filtered_df[~filtered_df['Number'].isin(excluded_numbers_list)]
         st.sidebar.info(f"Excluding {len(excluded_numbers_list)} numbers")
     
     # Display filter summary
@@ -215,16 +783,13 @@ if uploaded_file is not None:
     
     col1, col2, col3, col4, col5, col6 = st.columns(6)
     
-    total_calls = len(filtered_df)
-    call_placed = len(filtered_df[filtered_df['Call Status'] == 'call_placed'])
-    could_not_connect = len(filtered_df[filtered_df['Call Status'] == 'could_not_connect'])
-    completed = len(filtered_df[filtered_df['Call Status'] == 'completed'])
-    
-    # Task completion success (true only, from ALL filtered calls)
-    task_success = len(filtered_df[filtered_df['Analysis.task_completion'] == True])
-    
-    # Average duration (only for calls with duration > 0)
-    avg_duration = filtered_df[filtered_df['Duration'] > 0]['Duration'].mean()
+    metrics = key_metrics(filter_key, filtered_df, flags)
+    total_calls = metrics['total_calls']
+    call_placed = metrics['call_placed']
+    could_not_connect = metrics['could_not_connect']
+    completed = metrics['completed']
+    task_success = metrics['task_success']
+    avg_duration = metrics['avg_duration']
     
     with col1:
         st.metric("Calls Made", f"{total_calls:,}")
@@ -255,37 +820,15 @@ if uploaded_file is not None:
     st.markdown("---")
     st.header("🔢 Nth Call Analysis")
     
+    # Shared by the call number and pickup rate tabs
+    analysis_df = call_sequence(filter_key, filtered_df, flags)
+    
     tab1, tab2, tab3 = st.tabs(["📊 Call Number Analytics", "📈 Pickup Rate by Attempt", "🔥 Frequency Heatmap"])
     
     with tab1:
         st.subheader("Performance by Call Number")
         
-        # Assign call number per user
-        analysis_df = filtered_df.copy()
-        analysis_df = analysis_df.sort_values(by=['Number', 'Time'])
-        analysis_df['call_number'] = analysis_df.groupby('Number').cumcount() + 1
-        
-        # Build analytics table - INCLUDING all call statuses
-        nth_analytics = (
-            analysis_df.groupby('call_number')
-            .agg(
-                total_calls=('call_number', 'count'),
-                picked_up=('Call Status', lambda x: (x == 'completed').sum()),
-                goal_met=('Analysis.task_completion', lambda x: (x == True).sum()),  # Only True, not fillna
-                negative_sentiment=('Analysis.user_sentiment', lambda x: (x == 'negative').sum()),
-            )
-            .reset_index()
-        )
-        
-        # Calculate rates
-        nth_analytics['Call Pick Rate'] = (nth_analytics['picked_up'] / nth_analytics['total_calls'] * 100).round(1)
-        nth_analytics['Goal Success on Picked Calls'] = (
-            (nth_analytics['goal_met'] / nth_analytics['picked_up'] * 100)
-            .replace([np.inf, -np.inf], 0)
-            .fillna(0)
-            .round(1)
-        )
-        nth_analytics['Driver Negative'] = nth_analytics['negative_sentiment']
+        nth_analytics = nth_call_analytics(filter_key, analysis_df)
         
         # Rename for display
         display_nth = nth_analytics.rename(columns={
@@ -315,23 +858,7 @@ if uploaded_file is not None:
     with tab2:
         st.subheader("Pickup Rate Trend by Call Attempt")
         
-        # Calculate pickup rate by attempt - INCLUDING all call statuses
-        analysis_df = filtered_df.copy()
-        analysis_df = analysis_df.sort_values(by=['Number', 'Time'])
-        analysis_df['call_attempt'] = analysis_df.groupby('Number').cumcount() + 1
-        
-        attempt_funnel = (
-            analysis_df.groupby('call_attempt')
-            .agg(
-                attempts=('Call Status', 'count'),  # All attempts
-                completed=('Call Status', lambda x: (x == 'completed').sum())  # Only completed
-            )
-            .reset_index()
-        )
-        
-        attempt_funnel['pickup_rate_pct'] = (
-            attempt_funnel['completed'] / attempt_funnel['attempts'] * 100
-        ).round(1)
+        attempt_funnel = pickup_funnel(filter_key, analysis_df)
         
         # Plot
         fig = px.line(
@@ -376,74 +903,22 @@ if uploaded_file is not None:
                 help="Enable to count only one call per user per day (keeps best attempt)"
             )
         
-        # Use all calls or deduplicate based on toggle
-        heatmap_df = filtered_df.copy()
-        
         if deduplicate:
             st.info("📌 Deduplication enabled: Keeping one call per user per day (prioritizing completed calls)")
-            heatmap_df['completed_flag'] = (heatmap_df['Call Status'] == 'completed').astype(int)
-            
-            heatmap_df = (
-                heatmap_df.sort_values(
-                    by=['Number', 'call_date', 'completed_flag', 'Time'],
-                    ascending=[True, True, False, True]
-                )
-                .drop_duplicates(subset=['Number', 'call_date'], keep='first')
-            )
         else:
             st.info("📌 All calls included: Every call attempt is counted")
         
+        user_summary = user_call_summary(filter_key, filtered_df, flags, deduplicate, heatmap_type)
+        heatmap_pct_masked = heatmap_frequency(filter_key, user_summary, deduplicate, heatmap_type)
+        
         if heatmap_type == "Total Calls vs Completed Calls":
-            # User-level aggregation - ALL calls included
-            user_summary = (
-                heatmap_df.groupby('Number')
-                .agg(
-                    total_calls=('Number', 'count'),  # All calls
-                    completed_calls=('Call Status', lambda x: (x == 'completed').sum())  # Only completed
-                )
-                .reset_index()
-            )
-            
-            # Create 10+ bucket
-            user_summary['total_calls_bucket'] = user_summary['total_calls'].clip(upper=10)
-            user_summary['completed_calls_bucket'] = user_summary['completed_calls'].clip(upper=10)
-            
-            # Frequency table
-            freq_table = (
-                user_summary
-                .groupby(['total_calls_bucket', 'completed_calls_bucket'])
-                .size()
-                .reset_index(name='user_count')
-            )
-            
-            # Pivot + percentages
-            heatmap_pivot = freq_table.pivot(
-                index='total_calls_bucket',
-                columns='completed_calls_bucket',
-                values='user_count'
-            ).fillna(0)
-            
-            heatmap_pct = heatmap_pivot.div(heatmap_pivot.sum(axis=1), axis=0) * 100
-            
-            # Create mask for impossible cells
-            mask = np.zeros_like(heatmap_pct, dtype=bool)
-            for i, total_calls in enumerate(heatmap_pct.index):
-                for j, completed_calls in enumerate(heatmap_pct.columns):
-                    if completed_calls > total_calls:
-                        mask[i, j] = True
-            
-            # Apply mask
-            heatmap_pct_masked = heatmap_pct.copy()
-            heatmap_pct_masked[mask] = np.nan
-            
-            # Plot
+            # Plot - cell labels are formatted from z, so no separate text matrix is sent
             fig = go.Figure(data=go.Heatmap(
-                z=heatmap_pct_masked.values,
+                z=heatmap_pct_masked.values.round(1),
                 x=[f"{int(x)}" for x in heatmap_pct_masked.columns],
                 y=[f"{int(x)}" if x < 10 else "10+" for x in heatmap_pct_masked.index],
                 colorscale='YlGnBu',
-                text=heatmap_pct_masked.values.round(1),
-                texttemplate='%{text:.1f}%',
+                texttemplate='%{z:.1f}%',
                 textfont={"size": 10},
                 colorbar=dict(title="Percentage (%)")
             ))
@@ -458,65 +933,13 @@ if uploaded_file is not None:
             st.plotly_chart(fig, use_container_width=True)
         
         else:  # Task Success heatmap
-            # User-level aggregation - ALL calls included
-            user_summary = (
-                heatmap_df.groupby('Number')
-                .agg(
-                    total_calls=('Number', 'count'),  # All calls
-                    task_true_completed=('Analysis.task_completion', lambda x: (x == True).sum())  # Only True
-                )
-                .reset_index()
-            )
-            
-            # Create 10+ bucket for total_calls
-            user_summary['total_calls_bucket'] = user_summary['total_calls'].apply(
-                lambda x: "10+" if x >= 10 else str(x)
-            )
-            
-            # Frequency table
-            freq_table = (
-                user_summary
-                .groupby(['total_calls_bucket', 'task_true_completed'])
-                .size()
-                .reset_index(name='user_count')
-            )
-            
-            # Pivot + percentages
-            heatmap_pivot = freq_table.pivot(
-                index='total_calls_bucket',
-                columns='task_true_completed',
-                values='user_count'
-            ).fillna(0)
-            
-            # Sort index properly
-            numeric_indices = [i for i in heatmap_pivot.index if i != "10+"]
-            ordered_index = sorted(numeric_indices, key=int)
-            if "10+" in heatmap_pivot.index:
-                ordered_index.append("10+")
-            heatmap_pivot = heatmap_pivot.loc[ordered_index]
-            
-            heatmap_pct = heatmap_pivot.div(heatmap_pivot.sum(axis=1), axis=0) * 100
-            
-            # Create mask for impossible cells
-            mask = np.zeros_like(heatmap_pct, dtype=bool)
-            for i, total_calls in enumerate(heatmap_pct.index):
-                max_calls = 10 if total_calls == "10+" else int(total_calls)
-                for j, task_true_calls in enumerate(heatmap_pct.columns):
-                    if task_true_calls > max_calls:
-                        mask[i, j] = True
-            
-            # Apply mask
-            heatmap_pct_masked = heatmap_pct.copy()
-            heatmap_pct_masked[mask] = np.nan
-            
-            # Plot
+            # Plot - cell labels are formatted from z, so no separate text matrix is sent
             fig = go.Figure(data=go.Heatmap(
-                z=heatmap_pct_masked.values,
+                z=heatmap_pct_masked.values.round(1),
                 x=[f"{int(x)}" for x in heatmap_pct_masked.columns],
                 y=heatmap_pct_masked.index.tolist(),
                 colorscale='YlGnBu',
-                text=heatmap_pct_masked.values.round(1),
-                texttemplate='%{text:.1f}%',
+                texttemplate='%{z:.1f}%',
                 textfont={"size": 10},
                 colorbar=dict(title="Percentage (%)")
             ))
@@ -549,7 +972,7 @@ if uploaded_file is not None:
     # Available columns for grouping
     categorical_cols = [
         'Use Case', 'Call Status', 'Analysis.task_completion', 
-        'Analysis.user_sentiment', 'Hour', 'DayOfWeek'
+        'Analysis.user_sentiment', 'Hour', 'DayOfWeek', 'Duration_Bucket'
     ]
     
     # Available calculated fields
@@ -608,74 +1031,51 @@ if uploaded_file is not None:
     if st.button("Generate Tables", type="primary"):
         st.markdown("---")
         
-        # Display tables side by side (2 per row)
-        for i in range(0, len(table_configs), 2):
-            cols = st.columns(2)
-            
-            for j, col in enumerate(cols):
-                if i + j < len(table_configs):
-                    config = table_configs[i + j]
-                    
-                    with col:
-                        st.subheader(f"Table {i+j+1}")
+        # One tab per table. Streamlit still runs every tab's body, but each
+        # table is a cached lookup per filter state, so switching tabs or
+        # rerunning with unchanged filters recomputes nothing
+        tabs = st.tabs([f"Table {n+1}" for n in range(len(table_configs))])
+        for tab, config in zip(tabs, table_configs):
+            with tab:
+                try:
+                    # Build the table based on configuration
+                    if config['col_var'] is None:
+                        # Simple groupby: every metric for this row variable comes
+                        # from one cached aggregation pass, shared by all tables
+                        # grouped the same way
+                        selected = [
+                            BUILDER_METRIC_COLUMNS[metric] for metric in config['metrics']
+                            if metric in BUILDER_METRIC_COLUMNS
+                        ]
                         
-                        try:
-                            # Build the table based on configuration
-                            if config['col_var'] is None:
-                                # Simple groupby
-                                agg_dict = {}
-                                
-                                for metric in config['metrics']:
-                                    if metric == 'Count':
-                                        agg_dict['Number'] = 'count'
-                                    elif metric == 'Completed Calls':
-                                        agg_dict['Completed'] = ('Call Status', lambda x: (x == 'completed').sum())
-                                    elif metric == 'Could Not Connect':
-                                        agg_dict['Could Not Connect'] = ('Call Status', lambda x: (x == 'could_not_connect').sum())
-                                    elif metric == 'Task Success Count':
-                                        agg_dict['Task Success'] = ('Analysis.task_completion', lambda x: (x == True).sum())
-                                    elif metric == 'Avg Duration':
-                                        agg_dict['Avg Duration (s)'] = ('Duration', 'mean')
-                                    elif metric == 'Total Duration':
-                                        agg_dict['Total Duration (s)'] = ('Duration', 'sum')
-                                    elif metric == 'Max Duration':
-                                        agg_dict['Max Duration (s)'] = ('Duration', 'max')
-                                    elif metric == 'Negative Sentiment Count':
-                                        agg_dict['Negative Sentiment'] = ('Analysis.user_sentiment', lambda x: (x == 'negative').sum())
-                                
-                                if agg_dict:
-                                    result = filtered_df.groupby(config['row_var']).agg(**agg_dict).round(1)
-                                    
-                                    # Add calculated percentages
-                                    if 'Pickup Rate %' in config['metrics'] and 'Completed' in result.columns:
-                                        result['Pickup Rate %'] = (
-                                            (result['Completed'] / result.get('Number', result['Completed'])) * 100
-                                        ).round(1)
-                                    
-                                    if 'Task Success %' in config['metrics'] and 'Task Success' in result.columns and 'Completed' in result.columns:
-                                        result['Task Success %'] = (
-                                            (result['Task Success'] / result['Completed']) * 100
-                                        ).fillna(0).round(1)
-                                    
-                                    st.dataframe(result, use_container_width=True)
-                                else:
-                                    st.warning("Please select at least one metric")
+                        if selected:
+                            result = multi_agg(filter_key, filtered_df, flags, config['row_var'])[selected].round(1)
                             
-                            else:
-                                # Pivot table
-                                if 'Count' in config['metrics']:
-                                    result = pd.crosstab(
-                                        filtered_df[config['row_var']],
-                                        filtered_df[config['col_var']],
-                                        margins=True,
-                                        margins_name='Total'
-                                    )
-                                    st.dataframe(result, use_container_width=True)
-                                else:
-                                    st.info("Pivot tables currently support Count metric. More coming soon!")
-                        
-                        except Exception as e:
-                            st.error(f"Error generating table: {str(e)}")
+                            # Add calculated percentages
+                            if 'Pickup Rate %' in config['metrics'] and 'Completed' in result.columns:
+                                result['Pickup Rate %'] = (
+                                    (result['Completed'] / result.get('Number', result['Completed'])) * 100
+                                ).round(1)
+                            
+                            if 'Task Success %' in config['metrics'] and 'Task Success' in result.columns and 'Completed' in result.columns:
+                                result['Task Success %'] = (
+                                    (result['Task Success'] / result['Completed']) * 100
+                                ).fillna(0).round(1)
+                            
+                            st.dataframe(result, use_container_width=True)
+                        else:
+                            st.warning("Please select at least one metric")
+                    
+                    else:
+                        # Pivot table
+                        if 'Count' in config['metrics']:
+                            result = pivot_counts(filter_key, filtered_df, config['row_var'], config['col_var'])
+                            st.dataframe(result, use_container_width=True)
+                        else:
+                            st.info("Pivot tables currently support Count metric. More coming soon!")
+                
+                except Exception as e:
+                    st.error(f"Error generating table: {str(e)}")
     
     # Download filtered data
     st.markdown("---")
@@ -685,21 +1085,31 @@ if uploaded_file is not None:
     with col1:
         st.info(f"Current filtered dataset contains {len(filtered_df):,} records")
     with col2:
-        csv = filtered_df.to_csv(index=False)
         st.download_button(
             label="Download CSV",
-            data=csv,
+            data=filtered_csv(filter_key, df, filtered_rows),
             file_name=f"filtered_calls_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             mime="text/csv"
         )
+        # The Parquet file is only encoded on request; the prepared export
+        # stays offered until the filters change
+        if st.button("Prepare Parquet"):
+            st.session_state['parquet_export_key'] = filter_key
+        if st.session_state.get('parquet_export_key') == filter_key:
+            st.download_button(
+                label="Download Parquet",
+                data=filtered_parquet(filter_key, df, filtered_rows),
+                file_name=f"filtered_calls_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet",
+                mime="application/vnd.apache.parquet"
+            )
 
 else:
-    st.info("👆 Please upload a CSV file to begin analysis")
+    st.info("👆 Please upload a CSV or Parquet file to begin analysis")
     
     # Show example of expected format
     st.markdown("### Expected CSV Format")
     st.markdown("""
-    The CSV should contain the following columns:
+    The CSV (or Parquet) file should contain the following columns:
     - **Number**: Phone number
     - **Time**: Timestamp of the call
     - **Use Case**: Use case category